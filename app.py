@@ -8,6 +8,8 @@ users to edit them via the sidebar."""
 
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
 
 
@@ -23,6 +25,8 @@ from openai import AzureOpenAI
 from pdf_to_ppt import (
     pdf_to_ppt,
     detect_pdf_language,
+    compute_file_hash,
+    prepare_pdf,
     load_prompt,
     save_prompt,
 
@@ -93,6 +97,23 @@ def save_config(data: dict):
         json.dump(data, f)
 
 
+def discard_preprocessing() -> None:
+    """Cancel the background preprocessing and drop its result.
+
+    Waits for a running job to stop (it checks for cancellation between
+    pages) because PyMuPDF must not be used from two threads at once.
+    """
+    cancel_event = st.session_state.pop("prep_cancel", None)
+    if cancel_event is not None:
+        cancel_event.set()
+    future = st.session_state.pop("prep_future", None)
+    if future is not None:
+        try:
+            future.result()
+        except Exception:
+            pass
+
+
 processing = st.session_state.get("processing", False)
 
 ui_choice = st.sidebar.selectbox(
@@ -180,6 +201,12 @@ if edit_settings:
     pages_per_slide = st.number_input(
         "Pages per slide", value=int(SETTINGS.get("pages_per_slide", 1)), min_value=1
     )
+    duplicate_threshold = st.number_input(
+        "Near-duplicate page threshold (0 = off)",
+        value=float(SETTINGS.get("duplicate_threshold", 0)),
+        min_value=0.0,
+        max_value=1.0,
+    )
     languages_json = st.text_area(
         "Languages JSON", json.dumps(SETTINGS.get("languages", {}), indent=2), height=150
     )
@@ -196,6 +223,7 @@ if edit_settings:
                 "max_words_title": int(max_title),
                 "min_image_score": float(min_score),
                 "pages_per_slide": int(pages_per_slide),
+                "duplicate_threshold": float(duplicate_threshold),
                 "languages": languages,
             }
         )
@@ -209,18 +237,33 @@ uploaded_file = st.file_uploader(TR["upload"], type=["pdf"], disabled=processing
 language_code = ""
 # When a PDF is uploaded we detect its main language
 if uploaded_file:
+    pdf_bytes = uploaded_file.getvalue()
+    upload_hash = compute_file_hash(pdf_bytes)
     if (
-        # Detect language once per uploaded file
+        # Detect language and start preprocessing once per uploaded file
         "pdf_lang" not in st.session_state
-        or st.session_state.get("file_name") != uploaded_file.name
+        or st.session_state.get("file_hash") != upload_hash
     ):
+        # Stop the preprocessing of a previous file before PyMuPDF is
+        # used again for the new one
+        discard_preprocessing()
         # Save the file so PyMuPDF can read it
         with open("input.pdf", "wb") as f:
-            f.write(uploaded_file.read())
+            f.write(pdf_bytes)
         # Use a helper to detect the main language of the PDF
         detected = detect_pdf_language("input.pdf")
         st.session_state["pdf_lang"] = detected
-        st.session_state["file_name"] = uploaded_file.name
+        st.session_state["file_hash"] = upload_hash
+
+        # Extract and preprocess the PDF in the background while the
+        # user picks the options, using a single worker per session
+        if "prep_executor" not in st.session_state:
+            st.session_state["prep_executor"] = ThreadPoolExecutor(max_workers=1)
+        cancel_event = threading.Event()
+        st.session_state["prep_cancel"] = cancel_event
+        st.session_state["prep_future"] = st.session_state["prep_executor"].submit(
+            prepare_pdf, pdf_bytes, cancel_event
+        )
     detected_code = st.session_state.get("pdf_lang", "en")
     detected_name = LANGUAGE_NAMES.get(detected_code, detected_code)
     st.write(f"{TR['detected']}: {detected_name}")
@@ -239,6 +282,12 @@ if uploaded_file:
         value=int(SETTINGS.get("pages_per_slide", 1)),
         disabled=processing,
     )
+else:
+    # The file was removed: drop its preprocessing so a new upload of
+    # the same file starts from scratch
+    discard_preprocessing()
+    st.session_state.pop("file_hash", None)
+    st.session_state.pop("pdf_lang", None)
 
 
 generate = st.button(TR["generate"], disabled=processing)
@@ -250,7 +299,19 @@ log_messages = []
 if generate and uploaded_file:
     st.session_state["processing"] = True
     with open("input.pdf", "wb") as f:
-        f.write(uploaded_file.read())
+        f.write(pdf_bytes)
+
+    # Pick up the background preprocessing if it belongs to this file
+    # (pdf_to_ppt checks the file hash itself). The reference is dropped
+    # so the extracted pages do not stay in the session.
+    prepared = None
+    prep_future = st.session_state.pop("prep_future", None)
+    st.session_state.pop("prep_cancel", None)
+    if prep_future is not None:
+        try:
+            prepared = prep_future.result()
+        except Exception:
+            prepared = None
 
     client = AzureOpenAI(
         api_key=api_key,
@@ -280,7 +341,10 @@ if generate and uploaded_file:
 
             pages_per_slide=int(pages_per_slide),
             progress_callback=update_progress,
+            prepared=prepared,
         )
+    # Release the extracted pages, including all image bytes
+    del prepared
 
 
     st.session_state["processing"] = False
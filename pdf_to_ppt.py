@@ -7,7 +7,9 @@ import io
 from pathlib import Path
 from typing import List
 import base64
+import hashlib
 import json
+import re
 
 from langdetect import detect
 
@@ -39,6 +41,7 @@ DEFAULT_SETTINGS = {
 
     "min_image_score": 5,
     "pages_per_slide": 1,
+    "duplicate_threshold": 0,
 
 }
 
@@ -85,24 +88,252 @@ from pptx import Presentation
 from pptx.util import Inches, Pt
 
 
-def extract_pages(pdf_path: str):
-    """Extract text and images from each page of a PDF."""
+def _open_pdf(pdf_source):
+    """Open a PDF from a file path or from raw bytes."""
+    if isinstance(pdf_source, (bytes, bytearray)):
+        return fitz.open(stream=pdf_source, filetype="pdf")
+    return fitz.open(pdf_source)
+
+
+def _page_images(doc, page):
+    """Return the embedded images of a page as ``(bytes, ext)`` tuples."""
+    images = []
+    for img in page.get_images(full=True):
+        xref = img[0]
+        base_image = doc.extract_image(xref)
+        image_bytes = base_image["image"]
+        ext = base_image["ext"]
+        images.append((image_bytes, ext))
+    return images
+
+
+def extract_pages(pdf_source):
+    """Extract text and images from each page of a PDF.
+
+    ``pdf_source`` may be a file path or the raw PDF bytes.
+    """
     # Open the PDF with PyMuPDF
-    doc = fitz.open(pdf_path)
-    for page_num in range(len(doc)):
-        page = doc.load_page(page_num)
-        text = page.get_text("text")
-        images = []
-        for img in page.get_images(full=True):
-            xref = img[0]
-            base_image = doc.extract_image(xref)
-            image_bytes = base_image["image"]
-            ext = base_image["ext"]
-            images.append((image_bytes, ext))
-        yield page_num + 1, text, images
-
-    # Close the document to free resources
-    doc.close()
+    doc = _open_pdf(pdf_source)
+    try:
+        for page_num in range(len(doc)):
+            page = doc.load_page(page_num)
+            text = page.get_text("text")
+            yield page_num + 1, text, _page_images(doc, page)
+    finally:
+        # Close the document to free resources, also when the caller
+        # stops iterating early
+        doc.close()
+
+
+def compute_file_hash(data: bytes) -> str:
+    """Return a hash identifying the content of an uploaded file."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of tokens in ``text``."""
+    # About four characters per token is a common rule of thumb
+    return (len(text) + 3) // 4
+
+
+def text_shingles(text: str, shingle_size: int = 3) -> frozenset:
+    """Return the set of word shingles of ``text`` used to compare pages."""
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return frozenset()
+    return frozenset(
+        " ".join(words[i : i + shingle_size])
+        for i in range(max(len(words) - shingle_size + 1, 1))
+    )
+
+
+# Size of the grayscale thumbnail used for the image difference hash
+DHASH_SIZE = 16
+
+
+def image_dhash(image_bytes: bytes):
+    """Return a perceptual difference hash of an image.
+
+    The image is scaled to a small grayscale thumbnail and each bit
+    records whether a pixel is brighter than its right neighbor, so
+    slightly different scans of the same page get similar hashes.
+    Returns ``None`` if the image cannot be decoded.
+    """
+    try:
+        pix = fitz.Pixmap(image_bytes)
+        if pix.alpha:
+            pix = fitz.Pixmap(pix, 0)
+        if pix.n != 1:
+            pix = fitz.Pixmap(fitz.csGRAY, pix)
+        thumb = fitz.Pixmap(pix, DHASH_SIZE + 1, DHASH_SIZE)
+    except Exception:
+        return None
+    samples = thumb.samples
+    width = DHASH_SIZE + 1
+    value = 0
+    for row in range(DHASH_SIZE):
+        for col in range(DHASH_SIZE):
+            left = samples[row * width + col]
+            right = samples[row * width + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def _image_similarity(dhash_a, dhash_b) -> float:
+    """Return how similar two difference hashes are, from 0 to 1.
+
+    The share of equal bits is corrected for chance agreement, because
+    mostly white pages such as scans share many zero bits even when
+    their content differs.
+    """
+    if dhash_a is None or dhash_b is None:
+        return 0.0
+    bits = DHASH_SIZE * DHASH_SIZE
+    agreement = 1.0 - bin(dhash_a ^ dhash_b).count("1") / bits
+    ones_a = bin(dhash_a).count("1") / bits
+    ones_b = bin(dhash_b).count("1") / bits
+    chance = ones_a * ones_b + (1.0 - ones_a) * (1.0 - ones_b)
+    if chance >= 1.0:
+        # Both hashes are uniform, e.g. blank images
+        return 1.0 if dhash_a == dhash_b else 0.0
+    return (agreement - chance) / (1.0 - chance)
+
+
+def _images_contained(prepared: dict, idx: int, other: int, threshold: float) -> bool:
+    """Check that every image of page ``idx`` also appears on page ``other``.
+
+    Images match if their bytes are identical or if their difference
+    hashes are at least ``threshold`` similar.
+    """
+    other_hashes = prepared["image_hashes"][other]
+    other_dhashes = prepared["image_dhashes"][other]
+    for digest, dhash in zip(prepared["image_hashes"][idx], prepared["image_dhashes"][idx]):
+        if digest in other_hashes:
+            continue
+        if not any(_image_similarity(dhash, o) >= threshold for o in other_dhashes):
+            return False
+    return True
+
+
+def _text_containment(prepared: dict, idx: int, other: int) -> float:
+    """Return which fraction of the text of page ``idx`` is on page ``other``.
+
+    A page without text cannot be compared by its words. It counts as
+    contained only if the other page has no text either; its images
+    then decide. A page without images, such as a vector drawing, must
+    have the same content stream as the other page.
+    """
+    shingles = prepared["shingles"][idx]
+    if not shingles:
+        if prepared["shingles"][other]:
+            return 0.0
+        if not prepared["image_hashes"][idx]:
+            same = (
+                not prepared["image_hashes"][other]
+                and prepared["content_hashes"][idx] == prepared["content_hashes"][other]
+            )
+            return 1.0 if same else 0.0
+        return 1.0
+    return len(shingles & prepared["shingles"][other]) / len(shingles)
+
+
+def find_near_duplicates(prepared: dict, threshold: float):
+    """Find pages that are nearly contained in a neighboring page.
+
+    Each page is compared with the previously kept page. If the kept
+    page is contained in the new one, as with build-up animations
+    exported page by page, the kept page is replaced by the new one.
+    Only if the new page is the smaller one and its text and images are
+    (almost) all present on the kept page is it skipped.
+
+    Returns the indices of the pages to keep and a list of
+    ``(skipped_page, kept_page, similarity)`` tuples for the report.
+    """
+    pages = prepared["pages"]
+    if threshold <= 0:
+        return list(range(len(pages))), []
+
+    kept = []
+    skipped = []
+    for idx in range(len(pages)):
+        if not kept:
+            kept.append(idx)
+            continue
+        prev = kept[-1]
+
+        new_in_prev = _text_containment(prepared, idx, prev)
+        prev_in_new = _text_containment(prepared, prev, idx)
+        if (
+            prev_in_new >= threshold
+            and prev_in_new >= new_in_prev
+            and _images_contained(prepared, prev, idx, threshold)
+        ):
+            # The new page is the superset: keep it instead
+            skipped.append((pages[prev][0], pages[idx][0], prev_in_new))
+            kept[-1] = idx
+        elif new_in_prev >= threshold and _images_contained(prepared, idx, prev, threshold):
+            skipped.append((pages[idx][0], pages[prev][0], new_in_prev))
+        else:
+            kept.append(idx)
+    return kept, skipped
+
+
+def prepare_pdf(pdf_source, cancel_event=None) -> dict:
+    """Extract and preprocess a PDF ahead of slide generation.
+
+    This covers all work that does not need the language model, so it
+    can run in the background while the user is still choosing options.
+    The result carries the hash of the PDF so ``pdf_to_ppt`` can check
+    that it still belongs to the file being converted.
+
+    ``cancel_event`` is an optional ``threading.Event`` checked between
+    pages; once it is set, extraction stops and ``None`` is returned.
+    """
+    if isinstance(pdf_source, (bytes, bytearray)):
+        data = bytes(pdf_source)
+    else:
+        data = Path(pdf_source).read_bytes()
+
+    pages = []
+    image_hashes = []
+    image_dhashes = []
+    tokens = []
+    shingles = []
+    content_hashes = []
+    doc = _open_pdf(data)
+    try:
+        for page_num in range(len(doc)):
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            page = doc.load_page(page_num)
+            text = page.get_text("text")
+            # Drop images embedded more than once on the same page
+            unique_images = []
+            page_hashes = []
+            for img_bytes, ext in _page_images(doc, page):
+                digest = hashlib.sha1(img_bytes).hexdigest()
+                if digest in page_hashes:
+                    continue
+                page_hashes.append(digest)
+                unique_images.append((img_bytes, ext))
+            pages.append((page_num + 1, text, unique_images))
+            image_hashes.append(page_hashes)
+            image_dhashes.append([image_dhash(img) for img, _ in unique_images])
+            tokens.append(estimate_tokens(text))
+            shingles.append(text_shingles(text))
+            content_hashes.append(hashlib.sha1(page.read_contents()).hexdigest())
+    finally:
+        doc.close()
+
+    return {
+        "file_hash": compute_file_hash(data),
+        "pages": pages,
+        "image_hashes": image_hashes,
+        "image_dhashes": image_dhashes,
+        "tokens": tokens,
+        "shingles": shingles,
+        "content_hashes": content_hashes,
+    }
 
 
 def detect_pdf_language(pdf_path: str) -> str:
@@ -328,12 +559,21 @@ def pdf_to_ppt(
 
     pages_per_slide: int = 1,
     progress_callback=None,
+    prepared: dict = None,
+    duplicate_threshold: float = None,
 ) -> None:
     """Convert a PDF document to a summarized PowerPoint file.
 
     ``pages_per_slide`` controls how many PDF pages are combined before
     generating a single slide. The highest scoring image from that group
     is used if its relevance surpasses the configured minimum score.
+
+    ``prepared`` may hold the result of ``prepare_pdf`` computed earlier.
+    It is only used if its hash matches the file at ``pdf_path``.
+
+    Pages whose content is nearly contained in a neighboring page are
+    skipped before grouping. ``duplicate_threshold`` overrides the
+    configured similarity threshold; ``0`` disables the check.
     """
 
 
@@ -348,15 +588,51 @@ def pdf_to_ppt(
     min_score = SETTINGS.get("min_image_score", 5)
 
 
-    page_data = list(extract_pages(pdf_path))
+    # Reuse the background preprocessing unless the file has changed
+    pdf_bytes = Path(pdf_path).read_bytes()
+    if not prepared or prepared.get("file_hash") != compute_file_hash(pdf_bytes):
+        prepared = prepare_pdf(pdf_bytes)
+
+    if duplicate_threshold is None:
+        duplicate_threshold = SETTINGS.get("duplicate_threshold", 0)
+    kept, skipped = find_near_duplicates(prepared, float(duplicate_threshold))
+
+    page_data = [prepared["pages"][i] for i in kept]
+    image_hashes = [prepared["image_hashes"][i] for i in kept]
+    tokens = [prepared["tokens"][i] for i in kept]
     total_groups = (len(page_data) + pages_per_slide - 1) // pages_per_slide
 
+    # Report the pages left out as near duplicates
+    if progress_callback:
+        for skipped_page, kept_page, similarity in skipped:
+            progress_callback(
+                0,
+                total_groups,
+                f"Skipped page {skipped_page} (near duplicate of page {kept_page}, "
+                f"{similarity:.0%} similar)",
+            )
+
     for group_idx in range(total_groups):
-        group = page_data[group_idx * pages_per_slide : (group_idx + 1) * pages_per_slide]
+        start = group_idx * pages_per_slide
+        end = start + pages_per_slide
+        group = page_data[start:end]
         combined_text = "\n".join(p[1] for p in group)
-        group_images = [img for p in group for img in p[2]]
+
+        # Evaluate images repeated across the group (e.g. logos) only once
+        group_images = []
+        seen_hashes = set()
+        for p, hashes in zip(group, image_hashes[start:end]):
+            for img, digest in zip(p[2], hashes):
+                if digest not in seen_hashes:
+                    seen_hashes.add(digest)
+                    group_images.append(img)
         if progress_callback:
-            progress_callback(group_idx + 1, total_groups, f"Part {group_idx + 1}/{total_groups}")
+            group_tokens = sum(tokens[start:end])
+            progress_callback(
+                group_idx + 1,
+                total_groups,
+                f"Part {group_idx + 1}/{total_groups} (~{group_tokens} tokens)",
+            )
         title = generate_title(combined_text, client, deployment, language=language)
         bullets = summarize_text(combined_text, client, deployment, language=language)
 